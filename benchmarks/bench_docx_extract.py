@@ -0,0 +1,96 @@
+"""
+Compare streaming DOCX extraction with the python-docx paragraph join
+
+Usage: python benchmarks/bench_docx_extract.py [paragraphs]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image22  # noqa: E402
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+CONTENT_TYPES = (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+
+
+def clause(i):
+    return f"<w:p><w:r><w:t>Clause {i} the party of the first part shall indemnify the second part</w:t></w:r></w:p>"
+
+
+def build_document(path, blocks, table=False):
+    if table:
+        # One table holding every clause, two cells per row
+        rows = "".join(f"<w:tr><w:tc>{clause(i)}</w:tc><w:tc>{clause(-i)}</w:tc></w:tr>" for i in range(blocks))
+        body = f"<w:tbl>{rows}</w:tbl>"
+    else:
+        body = "".join(clause(i) for i in range(blocks))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", ROOT_RELS)
+        archive.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+
+
+def measure(label, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()  # Separate pass, tracing slows allocation-heavy code severalfold
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed:8.3f} s  peak {peak / 1e6:7.2f} MB (Python heap)")
+
+
+def consume(path):
+    for _ in image22.iter_docx_text(path):
+        pass
+
+
+def memory_profile(tmp):
+    """
+    Extractor memory without the joined output: should stay flat as paragraphs or table rows grow
+    """
+    for table in (False, True):
+        for blocks in (5000, 20000):
+            path = os.path.join(tmp, f"profile-{table}-{blocks}.docx")
+            build_document(path, blocks, table=table)
+            measure(f"{blocks} {'table rows' if table else 'paragraphs'}", lambda: consume(path))
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.docx")
+        memory_profile(tmp)
+
+        build_document(path, paragraphs)
+        print(f"{paragraphs} paragraphs, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+        measure("streaming", lambda: image22.extract_text_word(path))
+        try:
+            import docx
+        except ImportError:
+            print("python-docx not installed, skipping baseline")
+            return
+        measure("python-docx", lambda: "\n".join(p.text for p in docx.Document(path).paragraphs))
+
+
+if __name__ == "__main__":
+    main()
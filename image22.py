@@ -6,14 +6,21 @@ import numpy as np
 import pandas as pd
 from skimage.metrics import structural_similarity as ssim
 import fitz  # PyMuPDF for PDF handling
-import docx  # For handling Word documents
+import xml.etree.ElementTree as ET  # Streaming parse of Word document parts
 from difflib import HtmlDiff, SequenceMatcher  # For text comparison
 import os
 import cv2
 import logging
 import base64
+import re
+import bisect
 import zipfile
-from typing import Dict
+import time
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
 
 # Page configuration with custom theme
 st.set_page_config(
@@ -64,6 +71,123 @@ NVIDIA_API_KEY = "nvapi-n_Jh8Jm8_Tu-c3I6HBdqXnaomNN6kNvGUAaHVK-s-oUGqLOfzsIg7VOL
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)  # Create the directory
 
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join("metrics", "centurion.prom"))  # Prometheus text-format export
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Histogram buckets in seconds
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and latency histograms rendered in Prometheus text format
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts, sum, count]
+        self.help = {
+            "centurion_stage_duration_seconds": ("histogram", "Latency of each processing stage"),
+            "centurion_bytes_processed_total": ("counter", "Bytes processed per stage"),
+            "centurion_cache_hits_total": ("counter", "Cache hits per cache"),
+            "centurion_api_requests_total": ("counter", "Outbound NVIDIA API requests"),
+            "centurion_api_errors_total": ("counter", "Failed outbound NVIDIA API requests"),
+        }
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self.histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @staticmethod
+    def _format_labels(labels, extra=()) -> str:
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self.help.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (metric, labels), value in sorted(self.counters.items()):
+                        if metric == name:
+                            lines.append(f"{name}{self._format_labels(labels)} {value:.17g}")
+                else:
+                    for (metric, labels), (buckets, total, count) in sorted(self.histograms.items()):
+                        if metric != name:
+                            continue
+                        for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                            lines.append(f"{name}_bucket{self._format_labels(labels, [('le', f'{bound:g}')])} {bucket_count}")
+                        lines.append(f"{name}_bucket{self._format_labels(labels, [('le', '+Inf')])} {count}")
+                        lines.append(f"{name}_sum{self._format_labels(labels)} {total:.17g}")
+                        lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str = METRICS_FILE):
+        """
+        Atomically write the metrics snapshot for a textfile collector or scraper
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)  # Unique temp file per export, so concurrent reruns never share an inode
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+@st.cache_resource
+def get_metrics_registry() -> MetricsRegistry:
+    return MetricsRegistry()  # Shared across reruns and sessions
+
+metrics = get_metrics_registry()
+_run_started = time.perf_counter()  # Streamlit re-executes the script per run, so spans are per run
+_run_spans = []
+_span_depth = [0]
+
+@contextmanager
+def trace_span(stage: str, nbytes: int = 0, api: str = None):
+    """
+    Time a processing stage, record it in the current run's waterfall and the metrics registry
+
+    Args:
+        stage (str): Stage name used as the metric label
+        nbytes (int): Bytes processed by the stage
+        api (str): Endpoint label when the stage is an outbound NVIDIA call
+    """
+    start = time.perf_counter()
+    span = {"stage": stage, "start": start - _run_started, "duration": 0.0, "depth": _span_depth[0], "bytes": nbytes, "error": None}
+    _span_depth[0] += 1
+    if api:
+        metrics.inc("centurion_api_requests_total", endpoint=api)
+    try:
+        yield span
+    except Exception as e:
+        span["error"] = type(e).__name__
+        if api:
+            metrics.inc("centurion_api_errors_total", endpoint=api)
+        raise
+    finally:
+        _span_depth[0] -= 1
+        span["duration"] = time.perf_counter() - start
+        metrics.observe("centurion_stage_duration_seconds", span["duration"], stage=stage)
+        if span["bytes"]:
+            metrics.inc("centurion_bytes_processed_total", span["bytes"], stage=stage)
+        _run_spans.append(span)
+
 class NVIDIAOCRHandler:
     def __init__(self):
         self.api_key = NVIDIA_API_KEY  # Initialize API key
@@ -72,7 +196,8 @@ class NVIDIAOCRHandler:
 
     def process_image(self, file_path: str) -> str:
         try:
-            with open(file_path, "rb") as image_file:  # Open the image file
+            with open(file_path, "rb") as image_file, \
+                    trace_span("ocr_request", nbytes=os.path.getsize(file_path), api="ocdrnet"):  # Open the image file
                 files = {'image': image_file}  # Prepare file for upload
                 response = requests.post(self.nvai_url, headers=self.headers, files=files)  # Send POST request
                 response.raise_for_status()  # Raise an error for bad responses
@@ -84,7 +209,7 @@ class NVIDIAOCRHandler:
 
 def save_uploaded_file(uploaded_file):
     file_path = os.path.join(UPLOAD_DIR, uploaded_file.name)  # Create file path
-    with open(file_path, "wb") as f:  # Open file for writing
+    with trace_span("upload", nbytes=uploaded_file.size), open(file_path, "wb") as f:  # Open file for writing
         f.write(uploaded_file.getbuffer())  # Write uploaded file to disk
     return file_path  # Return the file path
 
@@ -99,47 +224,287 @@ def upload_asset(input_data: bytes, description: str) -> str:
 
         payload = {"contentType": "image/jpeg", "description": description}  # Prepare payload for upload
         
-        response = requests.post(assets_url, headers=headers, json=payload)
-        response.raise_for_status()
+        with trace_span("asset_create", api="nvcf_assets"):
+            response = requests.post(assets_url, headers=headers, json=payload)
+            response.raise_for_status()
 
         asset_url = response.json()["uploadUrl"]
         asset_id = response.json()["assetId"]
 
-        response = requests.put(
-            asset_url,
-            data=input_data,
-            headers={"x-amz-meta-nvcf-asset-description": description, "content-type": "image/jpeg"},
-            timeout=300,
-        )
+        with trace_span("asset_put", nbytes=len(input_data), api="nvcf_asset_storage"):
+            response = requests.put(
+                asset_url,
+                data=input_data,
+                headers={"x-amz-meta-nvcf-asset-description": description, "content-type": "image/jpeg"},
+                timeout=300,
+            )
 
-        response.raise_for_status()
+            response.raise_for_status()
         return asset_id
     except Exception as e:
         st.error(f"Error uploading asset: {str(e)}")
         return ""
 
 def extract_text_pdf(file_path):
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
+    with trace_span("pdf_extract", nbytes=os.path.getsize(file_path)):
+        doc = fitz.open(file_path)
+        text = ""
+        for page in doc:
+            text += page.get_text()
     return text
 
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"  # WordprocessingML namespace
+MC_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"  # Markup compatibility (mc:AlternateContent)
+
+def _docx_part_order(name: str):
+    return [int(tok) if tok.isdigit() else tok for tok in re.split(r"(\d+)", name)]  # header2 before header10
+
+def _iter_docx_part(xml_file, marker: str) -> Iterator[str]:
+    """
+    Stream text from one WordprocessingML part without building the full tree
+
+    Args:
+        xml_file: Open file object for the part inside the zip container
+        marker (str): Structural marker prefix for this part
+
+    Yields:
+        str: Paragraphs, table rows and note markers in document order
+    """
+    paragraphs = []  # Stack of text-piece lists, one per open paragraph (text boxes nest paragraphs)
+    open_elements = []  # Ancestors of the current element; finished children are detached from them
+    fallback = 0  # Depth inside mc:Fallback, which repeats the mc:Choice content
+    rows = []  # Stack of cell lists, one per open table row (tables nest)
+    cells = []  # Stack of paragraph lists, one per open table cell
+    table_count = 0
+
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            open_elements.append(elem)
+            if tag == MC_NS + "Fallback":
+                fallback += 1
+            if fallback:
+                continue
+            if tag == W_NS + "tbl" and not rows:
+                table_count += 1
+                yield f"[{marker} Table {table_count}]"
+            elif tag == W_NS + "p":
+                paragraphs.append([])
+            elif tag == W_NS + "tr":
+                rows.append([])
+            elif tag == W_NS + "tc":
+                cells.append([])
+            elif tag in (W_NS + "footnote", W_NS + "endnote"):
+                if elem.get(W_NS + "type") not in ("separator", "continuationSeparator", "continuationNotice"):
+                    yield f"[{marker} {elem.get(W_NS + 'id')}]"
+            continue
+
+        # Run content only: tab stops under w:pPr are not characters. Deleted text (w:delText), field
+        # codes (w:instrText, w:fldChar), w:lastRenderedPageBreak and drawings carry no visible text.
+        in_run = bool(paragraphs) and open_elements[-2].tag == W_NS + "r"
+        if fallback:
+            if tag == MC_NS + "Fallback":
+                fallback -= 1
+        elif in_run and tag == W_NS + "t":
+            paragraphs[-1].append(elem.text or "")
+        elif in_run and tag in (W_NS + "tab", W_NS + "ptab"):
+            paragraphs[-1].append("\t")
+        elif in_run and tag == W_NS + "noBreakHyphen":
+            paragraphs[-1].append("-")
+        elif in_run and tag == W_NS + "softHyphen":
+            pass  # Optional hyphen is invisible unless the line breaks there
+        elif in_run and tag == W_NS + "sym":
+            paragraphs[-1].append(chr(int(elem.get(W_NS + "char", "003F"), 16)))
+        elif in_run and tag in (W_NS + "br", W_NS + "cr"):
+            paragraphs[-1].append("\n")
+        elif in_run and tag in (W_NS + "footnoteReference", W_NS + "endnoteReference"):
+            paragraphs[-1].append(f"[^{elem.get(W_NS + 'id')}]")
+        elif tag == W_NS + "p":
+            text = "".join(paragraphs.pop())
+            if cells:
+                cells[-1].append(text)
+            elif text:
+                yield text
+        elif tag == W_NS + "tc":
+            rows[-1].append(" ".join(p for p in cells.pop() if p))
+        elif tag == W_NS + "tr":
+            row = " | ".join(rows.pop())
+            if cells:
+                cells[-1].append(row)  # Nested table row stays inside its parent cell
+            elif row.strip(" |"):
+                yield row
+        elif tag == W_NS + "tbl" and not rows:
+            yield f"[/{marker} Table {table_count}]"
+
+        open_elements.pop()
+        if open_elements:
+            open_elements[-1].remove(elem)  # Detach every finished element so memory stays constant, even in tables
+
+def iter_docx_text(file_path) -> Iterator[str]:
+    """
+    Stream text out of a DOCX container including tables, headers, footers and notes
+
+    Args:
+        file_path (str): Path to the .docx file
+
+    Yields:
+        str: Lines of text with structural markers such as [Header 1] or [Body Table 2]
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        headers = sorted((n for n in names if re.fullmatch(r"word/header\d*\.xml", n)), key=_docx_part_order)
+        footers = sorted((n for n in names if re.fullmatch(r"word/footer\d*\.xml", n)), key=_docx_part_order)
+
+        parts = [(name, f"Header {i}") for i, name in enumerate(headers, 1)]
+        parts.append(("word/document.xml", "Body"))
+        parts += [(name, f"Footer {i}") for i, name in enumerate(footers, 1)]
+        parts += [("word/footnotes.xml", "Footnote"), ("word/endnotes.xml", "Endnote")]
+
+        for name, marker in parts:
+            if name not in names:
+                continue
+            if marker.startswith(("Header", "Footer")):
+                yield f"[{marker}]"
+            with archive.open(name) as xml_file:
+                yield from _iter_docx_part(xml_file, marker)
+
 def extract_text_word(file_path):
-    doc = docx.Document(file_path)
-    text = "\n".join([para.text for para in doc.paragraphs])
+    with trace_span("docx_extract", nbytes=os.path.getsize(file_path)):
+        text = "\n".join(iter_docx_text(file_path))
     return text
 
 def compare_texts(text1, text2):
     differ = HtmlDiff()
-    return differ.make_file(
-        text1.splitlines(), text2.splitlines(),
-        fromdesc="Original", todesc="Modified", context=True, numlines=2
-    )
+    with trace_span("html_render", nbytes=len(text1.encode("utf-8")) + len(text2.encode("utf-8"))):
+        return differ.make_file(
+            text1.splitlines(), text2.splitlines(),
+            fromdesc="Original", todesc="Modified", context=True, numlines=2
+        )
 
 def calculate_similarity(text1, text2):
-    matcher = SequenceMatcher(None, text1, text2)
-    return matcher.ratio()
+    with trace_span("similarity", nbytes=len(text1.encode("utf-8")) + len(text2.encode("utf-8"))):
+        matcher = SequenceMatcher(None, text1, text2)
+        return matcher.ratio()
+
+OCR_CONFUSIONS = str.maketrans({"0": "o", "1": "l", "i": "l", "|": "l", "!": "l", "5": "s"})  # Glyphs OCR mixes up
+MAX_CHUNK_CELLS = 250_000  # Largest words1 x words2 chunk handed to SequenceMatcher, which is quadratic
+MAX_ANCHOR_DEPTH = 8  # Re-anchoring rounds before an oversized chunk is reported as one replacement
+
+def normalize_ocr_token(token: str, ocr: bool = True) -> str:
+    key = token.casefold()
+    if not ocr:
+        return key  # Extracted text: "5" vs "S" is a real edit
+    key = key.strip(".,;:!?'\"()[]")  # Strip punctuation before "!" and "|" are mapped to letters
+    key = key.replace("rn", "m").translate(OCR_CONFUSIONS)
+    return key or token
+
+def _unique_anchors(keys1: List[str], keys2: List[str], ngram: int = 1) -> List[tuple]:
+    """
+    Pair tokens that occur exactly once in both texts, keeping the longest run that appears in the same order
+
+    With ngram > 1 a token is keyed by the words starting at it, for texts with few unique words
+    """
+    if ngram > 1:
+        keys1 = list(zip(*(keys1[k:] for k in range(ngram))))
+        keys2 = list(zip(*(keys2[k:] for k in range(ngram))))
+    counts1, counts2 = Counter(keys1), Counter(keys2)
+    index2 = {key: j for j, key in enumerate(keys2) if counts2[key] == 1}
+    pairs = [(i, index2[key]) for i, key in enumerate(keys1) if counts1[key] == 1 and key in index2]
+
+    # Longest increasing subsequence on the second text's positions
+    tails, tail_ids, previous = [], [], [None] * len(pairs)
+    for n, (_, j) in enumerate(pairs):
+        k = bisect.bisect_left(tails, j)
+        if k == len(tails):
+            tails.append(j)
+            tail_ids.append(n)
+        else:
+            tails[k] = j
+            tail_ids[k] = n
+        previous[n] = tail_ids[k - 1] if k else None
+
+    anchors = []
+    n = tail_ids[-1] if tail_ids else None
+    while n is not None:
+        anchors.append(pairs[n])
+        n = previous[n]
+    return anchors[::-1]
+
+def _diff_chunk(keys1: List[str], start1: int, keys2: List[str], start2: int, depth: int = 0) -> List[tuple]:
+    """
+    Diff the words between two anchors, re-anchoring inside chunks too large for SequenceMatcher
+    """
+    if not keys1 and not keys2:
+        return []
+    if not keys1 or not keys2:
+        return [("delete" if keys1 else "insert", start1, start1 + len(keys1), start2, start2 + len(keys2))]
+
+    if len(keys1) * len(keys2) <= MAX_CHUNK_CELLS:
+        matcher = SequenceMatcher(None, keys1, keys2, autojunk=False)
+        return [
+            (tag, start1 + i1, start1 + i2, start2 + j1, start2 + j2)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"
+        ]
+
+    # Tokens repeated across the whole text are often unique within this chunk, or as word pairs/triples
+    anchors = []
+    for ngram in (1, 2, 3):
+        if anchors or depth >= MAX_ANCHOR_DEPTH:
+            break
+        anchors = _unique_anchors(keys1, keys2, ngram)
+    if anchors:
+        opcodes = []
+        prev1 = prev2 = 0
+        for i, j in anchors + [(len(keys1), len(keys2))]:
+            if i > prev1 or j > prev2:
+                opcodes += _diff_chunk(keys1[prev1:i], start1 + prev1, keys2[prev2:j], start2 + prev2, depth + 1)
+            prev1, prev2 = i + 1, j + 1
+        return opcodes
+
+    # No anchors left: trim the common prefix and suffix and report the rest as one replacement
+    head = 0
+    while head < min(len(keys1), len(keys2)) and keys1[head] == keys2[head]:
+        head += 1
+    tail = 0
+    while tail < min(len(keys1), len(keys2)) - head and keys1[-1 - tail] == keys2[-1 - tail]:
+        tail += 1
+    return [("replace", start1 + head, start1 + len(keys1) - tail, start2 + head, start2 + len(keys2) - tail)]
+
+def compare_words(text1: str, text2: str, ocr: bool = False) -> List[Dict]:
+    """
+    Word-level diff that ignores line breaks, whitespace and case
+
+    Args:
+        text1 (str): Original text
+        text2 (str): Modified text
+        ocr (bool): Also treat OCR glyph confusions (0/O, 1/l, rn/m) and edge punctuation as equal
+
+    Returns:
+        List[Dict]: Changed spans with the operation, the words on each side and their character offsets
+    """
+    with trace_span("word_diff", nbytes=len(text1.encode("utf-8")) + len(text2.encode("utf-8"))):
+        words1 = list(re.finditer(r"\S+", text1))
+        words2 = list(re.finditer(r"\S+", text2))
+        keys1 = [normalize_ocr_token(w.group(), ocr) for w in words1]
+        keys2 = [normalize_ocr_token(w.group(), ocr) for w in words2]
+        opcodes = _diff_chunk(keys1, 0, keys2, 0)
+
+    def char_span(words, text, start, end):
+        if start < end:
+            return words[start].start(), words[end - 1].end()
+        position = words[start].start() if start < len(words) else len(text)
+        return position, position
+
+    changes = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        changes.append({
+            "Change": tag,
+            "Original": " ".join(w.group() for w in words1[i1:i2]),
+            "Modified": " ".join(w.group() for w in words2[j1:j2]),
+            "Original Span": char_span(words1, text1, i1, i2),
+            "Modified Span": char_span(words2, text2, j1, j2),
+        })
+    return changes
 
 logging.basicConfig(
     level=logging.INFO, 
@@ -219,14 +584,16 @@ class NvidiaDeepfakeDetector:
                 "description": desc
             }
             
-            response = requests.post(assets_url, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
+            with trace_span("asset_create", api="nvcf_assets"):
+                response = requests.post(assets_url, headers=headers, json=payload, timeout=30)
+                response.raise_for_status()
             
             upload_url = response.json()["uploadUrl"]
             asset_id = response.json()["assetId"]
             
             # Upload image
-            with open(path, "rb") as input_data:
+            with open(path, "rb") as input_data, \
+                    trace_span("asset_put", nbytes=os.path.getsize(path), api="nvcf_asset_storage"):
                 upload_response = requests.put(
                     upload_url,
                     data=input_data,
@@ -282,8 +649,9 @@ class NvidiaDeepfakeDetector:
                 }
 
             # API Call
-            response = requests.post(self.invoke_url, headers=headers, json=payload)
-            response.raise_for_status()
+            with trace_span("deepfake_request", nbytes=len(image_bytes), api="deepfake_detection"):
+                response = requests.post(self.invoke_url, headers=headers, json=payload)
+                response.raise_for_status()
 
             # Clean up temporary file
             os.remove(temp_path)
@@ -361,7 +729,8 @@ def nvidia_deepfake_detection_app():
 def detect_watermark(image, text):
     try:
         gray_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
-        detected_text = pytesseract.image_to_string(gray_image)
+        with trace_span("watermark_ocr", nbytes=gray_image.nbytes):
+            detected_text = pytesseract.image_to_string(gray_image)
         return text.strip().lower() in detected_text.strip().lower()
     except Exception as e:
         st.error(f"Error in watermark detection: {str(e)}")
@@ -415,11 +784,12 @@ def image_comparison_app():
         uploaded_file2 = st.file_uploader("Choose the image to compare", type=["png", "jpg", "jpeg"], key="comp2")
 
     if uploaded_file1 and uploaded_file2:
-        image1 = Image.open(uploaded_file1)
-        image2 = Image.open(uploaded_file2)
+        with trace_span("decode", nbytes=uploaded_file1.size + uploaded_file2.size):
+            image1 = Image.open(uploaded_file1)
+            image2 = Image.open(uploaded_file2)
 
-        img1 = cv2.cvtColor(np.array(image1), cv2.COLOR_RGB2BGR)
-        img2 = cv2.cvtColor(np.array(image2), cv2.COLOR_RGB2BGR)
+            img1 = cv2.cvtColor(np.array(image1), cv2.COLOR_RGB2BGR)
+            img2 = cv2.cvtColor(np.array(image2), cv2.COLOR_RGB2BGR)
 
         if img1.shape != img2.shape:
             st.warning("Images are not the same size. Resizing the second image to match the first.")
@@ -427,12 +797,14 @@ def image_comparison_app():
 
         gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
         gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
-        score, diff = ssim(gray1, gray2, full=True)
+        with trace_span("ssim", nbytes=gray1.nbytes + gray2.nbytes):
+            score, diff = ssim(gray1, gray2, full=True)
         st.write(f"**Structural Similarity Index (SSIM): {score:.4f}**")
         diff = (diff * 255).astype("uint8")
 
-        thresh = cv2.threshold(diff, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        with trace_span("find_contours", nbytes=diff.nbytes):
+            thresh = cv2.threshold(diff, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
         img1_diff = img1.copy()
         img2_diff = img2.copy()
@@ -522,8 +894,9 @@ def process_deepfake_detection_nvidia(image_bytes):
                 "Accept": "application/json",
             }
 
-            response = requests.post(invoke_url, headers=headers, json= payload)
-            response.raise_for_status()
+            with trace_span("deepfake_request", nbytes=len(image_bytes), api="deepfake_detection"):
+                response = requests.post(invoke_url, headers=headers, json= payload)
+                response.raise_for_status()
             response_json = response.json()
             return response_json  # Return the result
     except requests.exceptions.RequestException as e:
@@ -674,26 +1047,77 @@ def document_comparison_tool():
             st.metric("Changes Detected", "Yes" if similarity_score < 1 else "No")
 
         st.markdown("### 🔍 Detailed Comparison")
-        diff_html = compare_texts(original_text, modified_text)
-        st.components.v1.html(diff_html, height=600, scrolling=True)
+        is_ocr = original_ext in ['.jpg', '.jpeg', '.png'] or modified_ext in ['.jpg', '.jpeg', '.png']
+        comparison_mode = st.radio(
+            "Comparison mode",
+            ["Line-by-line", "Word-level (OCR tolerant)"],
+            index=1 if is_ocr else 0,
+            horizontal=True,
+            key='doc_comparison_mode'
+        )
+
+        if comparison_mode == "Line-by-line":
+            diff_html = compare_texts(original_text, modified_text)
+            st.components.v1.html(diff_html, height=600, scrolling=True)
+            report_data, report_name, report_mime = diff_html, "comparison_report.html", "text/html"
+        else:
+            changes_df = pd.DataFrame(
+                compare_words(original_text, modified_text, ocr=is_ocr),
+                columns=["Change", "Original", "Modified", "Original Span", "Modified Span"]
+            )
+            st.write(f"**{len(changes_df)} changed spans**")
+            st.dataframe(changes_df, use_container_width=True)
+            report_data, report_name, report_mime = changes_df.to_csv(index=False), "comparison_report.csv", "text/csv"
 
         st.markdown("### 💾 Download Results")
         if st.button("Generate Report"):
             st.success("Report generated successfully!")
             st.download_button(
                 label="Download Report",
-                data=diff_html,
-                file_name="comparison_report.html",
-                mime="text/html"
+                data=report_data,
+                file_name=report_name,
+                mime=report_mime
             )
 
     else:
         st.info("Please upload both documents to begin comparison.")
 
+def render_trace_panel():
+    st.markdown("### ⏱️ Trace Waterfall")
+    if not _run_spans:
+        st.info("No spans recorded in this run.")
+    else:
+        total = max(span["start"] + span["duration"] for span in _run_spans) or 1.0
+        rows = []
+        for span in sorted(_run_spans, key=lambda s: s["start"]):
+            left = 100 * span["start"] / total
+            width = max(100 * span["duration"] / total, 0.5)
+            color = "#d9534f" if span["error"] else "#4a4c56"
+            rows.append(
+                f'<div style="display:flex;align-items:center;font-size:12px;margin:2px 0;">'
+                f'<div style="width:220px;padding-left:{span["depth"] * 12}px;">{span["stage"]}</div>'
+                f'<div style="flex:1;position:relative;height:14px;background:#f0f2f6;">'
+                f'<div style="position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:100%;background:{color};"></div></div>'
+                f'<div style="width:90px;text-align:right;">{span["duration"] * 1000:.1f} ms</div></div>'
+            )
+        st.markdown("".join(rows), unsafe_allow_html=True)
+        st.dataframe(pd.DataFrame(_run_spans))
+
+    with st.expander("Metrics (Prometheus format)"):
+        prometheus_text = metrics.render_prometheus()
+        st.code(prometheus_text)
+        st.download_button(
+            label="Download Metrics",
+            data=prometheus_text,
+            file_name="metrics.prom",
+            mime="text/plain"
+        )
+
 def main():
     st.write("""
     Welcome to the Centurion Analysis Tool! Use the tabs below to navigate through the different functionalities.
     """)
+    show_trace_panel = st.sidebar.checkbox("Show trace debug panel", value=False)
 
     tabs = st.tabs([
         "Image Comparison",
@@ -702,17 +1126,25 @@ def main():
         "Document Comparison Tool"
     ])
 
-    with tabs[0]:
+    with tabs[0], trace_span("image_comparison_app"):
         image_comparison_app()
 
-    with tabs[1]:
+    with tabs[1], trace_span("watermarking_app"):
         image_comparison_and_watermarking_app()
     
-    with tabs[2]:
+    with tabs[2], trace_span("deepfake_detection_app"):
         nvidia_deepfake_detection_app()
 
-    with tabs[3]:
+    with tabs[3], trace_span("document_comparison_tool"):
         document_comparison_tool()
 
+    try:
+        metrics.export()
+    except OSError as e:
+        logger.error(f"Metrics export failed: {e}")
+
+    if show_trace_panel:
+        render_trace_panel()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,200 @@
+import random
+import zipfile
+
+import pytest
+
+import image22
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+MC = 'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = image22.MetricsRegistry()
+    monkeypatch.setattr(image22, "metrics", registry)
+    return registry
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    registry.observe("centurion_stage_duration_seconds", 0.003, stage="ssim")
+    registry.observe("centurion_stage_duration_seconds", 0.3, stage="ssim")
+    registry.observe("centurion_stage_duration_seconds", 120.0, stage="ssim")
+    lines = registry.render_prometheus().splitlines()
+    assert 'centurion_stage_duration_seconds_bucket{stage="ssim",le="0.005"} 1' in lines
+    assert 'centurion_stage_duration_seconds_bucket{stage="ssim",le="0.5"} 2' in lines
+    assert 'centurion_stage_duration_seconds_bucket{stage="ssim",le="60"} 2' in lines
+    assert 'centurion_stage_duration_seconds_bucket{stage="ssim",le="+Inf"} 3' in lines
+    assert 'centurion_stage_duration_seconds_count{stage="ssim"} 3' in lines
+
+
+def test_large_counters_are_exact(registry):
+    registry.inc("centurion_bytes_processed_total", 12345678, stage="upload")
+    registry.inc("centurion_bytes_processed_total", 1, stage="upload")
+    assert 'centurion_bytes_processed_total{stage="upload"} 12345679' in registry.render_prometheus().splitlines()
+
+
+def test_span_records_api_error_depth_and_error(registry):
+    with pytest.raises(RuntimeError):
+        with image22.trace_span("outer"):
+            with image22.trace_span("ocr_request", nbytes=10, api="ocdrnet"):
+                raise RuntimeError("boom")
+    inner, outer = image22._run_spans[-2:]
+    assert (inner["stage"], inner["depth"], inner["error"]) == ("ocr_request", outer["depth"] + 1, "RuntimeError")
+    assert outer["error"] == "RuntimeError"
+    lines = registry.render_prometheus().splitlines()
+    assert 'centurion_api_requests_total{endpoint="ocdrnet"} 1' in lines
+    assert 'centurion_api_errors_total{endpoint="ocdrnet"} 1' in lines
+    assert 'centurion_bytes_processed_total{stage="ocr_request"} 10' in lines
+
+
+def test_span_without_error(registry):
+    with image22.trace_span("upload", nbytes=5):
+        pass
+    span = image22._run_spans[-1]
+    assert span["error"] is None and span["bytes"] == 5
+    assert "centurion_api_errors_total{" not in registry.render_prometheus()
+
+
+def test_export_leaves_no_temp_files(registry, tmp_path):
+    registry.inc("centurion_cache_hits_total", cache="ocr")
+    path = tmp_path / "nested" / "centurion.prom"
+    registry.export(str(path))
+    registry.export(str(path))
+    assert 'centurion_cache_hits_total{cache="ocr"} 1' in path.read_text()
+    assert [p.name for p in path.parent.iterdir()] == ["centurion.prom"]
+
+
+def build_docx(path, body, header=None, footnotes=None):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {W} {MC}><w:body>{body}</w:body></w:document>")
+        if header is not None:
+            archive.writestr("word/header1.xml", f"<w:hdr {W}>{header}</w:hdr>")
+        if footnotes is not None:
+            archive.writestr("word/footnotes.xml", f"<w:footnotes {W}>{footnotes}</w:footnotes>")
+    return str(path)
+
+
+def paragraph(text, tab_stops=0):
+    tabs = "".join(f'<w:tab w:val="center" w:pos="{4680 * (i + 1)}"/>' for i in range(tab_stops))
+    ppr = f"<w:pPr><w:tabs>{tabs}</w:tabs></w:pPr>" if tab_stops else ""
+    return f"<w:p>{ppr}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def cell(content):
+    return f"<w:tc>{content}</w:tc>"
+
+
+def test_tab_stops_are_not_text(tmp_path):
+    body = paragraph("Title", tab_stops=2) + '<w:p><w:r><w:t>Left</w:t><w:tab/><w:t>Right</w:t></w:r></w:p>'
+    path = build_docx(tmp_path / "tabs.docx", body, header=paragraph("Confidential", tab_stops=1))
+    assert list(image22.iter_docx_text(path)) == ["[Header 1]", "Confidential", "Title", "Left\tRight"]
+
+
+def test_nested_table_rows_stay_in_parent_cell(tmp_path):
+    inner = f"<w:tbl><w:tr>{cell(paragraph('x'))}{cell(paragraph('y'))}</w:tr></w:tbl>"
+    body = (
+        paragraph("Intro")
+        + f"<w:tbl><w:tr>{cell(paragraph('a'))}{cell(paragraph('b'))}</w:tr>"
+        + f"<w:tr>{cell(paragraph('c'))}{cell(inner)}</w:tr></w:tbl>"
+        + paragraph("After")
+    )
+    path = build_docx(tmp_path / "table.docx", body)
+    assert list(image22.iter_docx_text(path)) == [
+        "Intro", "[Body Table 1]", "a | b", "c | x | y", "[/Body Table 1]", "After",
+    ]
+
+
+def test_footnotes_skip_separators(tmp_path):
+    body = '<w:p><w:r><w:t>Clause</w:t></w:r><w:r><w:footnoteReference w:id="1"/></w:r></w:p>'
+    footnotes = (
+        '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>'
+        f'<w:footnote w:id="1">{paragraph("See schedule")}</w:footnote>'
+    )
+    path = build_docx(tmp_path / "notes.docx", body, footnotes=footnotes)
+    assert list(image22.iter_docx_text(path)) == ["Clause[^1]", "[Footnote 1]", "See schedule"]
+
+
+def test_text_box_fallback_is_not_duplicated(tmp_path):
+    box = "<w:txbxContent>{}</w:txbxContent>".format(paragraph("Boxed"))
+    body = (
+        "<w:p><w:r><mc:AlternateContent>"
+        f"<mc:Choice Requires=\"wps\"><w:drawing>{box}</w:drawing></mc:Choice>"
+        f"<mc:Fallback><w:pict>{box}</w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r><w:r><w:t>Anchor</w:t></w:r></w:p>"
+    )
+    path = build_docx(tmp_path / "textbox.docx", body)
+    assert list(image22.iter_docx_text(path)) == ["Boxed", "Anchor"]
+
+
+def test_run_level_characters(tmp_path):
+    body = (
+        '<w:p><w:r><w:t>a</w:t><w:noBreakHyphen/><w:t>b</w:t></w:r></w:p>'
+        '<w:p><w:r><w:t>con</w:t><w:softHyphen/><w:t>tract</w:t></w:r></w:p>'
+        '<w:p><w:r><w:sym w:font="Wingdings" w:char="2713"/><w:t> done</w:t></w:r></w:p>'
+    )
+    path = build_docx(tmp_path / "chars.docx", body)
+    assert list(image22.iter_docx_text(path)) == ["a-b", "contract", "\u2713 done"]
+
+@pytest.mark.parametrize("ocr_token, token", [
+    ("0RDER", "order"),
+    ("1ist", "list"),
+    ("Il", "ll"),
+    ("rnodern", "modem"),
+    ("Hello!", "hello"),
+    ("Wow!!", "wow"),
+    ("(Total):", "Total"),
+])
+def test_normalize_ocr_token_matches_confusions(ocr_token, token):
+    assert image22.normalize_ocr_token(ocr_token) == image22.normalize_ocr_token(token)
+
+
+def test_normalize_ocr_token_strips_punctuation_before_mapping():
+    assert image22.normalize_ocr_token("Hello!") == "hello"
+    assert image22.normalize_ocr_token("Wow!!") == "wow"
+    assert image22.normalize_ocr_token("--") == "--"
+
+
+def test_compare_words_ignores_ocr_noise():
+    original = "The total am0unt of 1,000\ndollars shall\nbe paid. Stop! now"
+    modified = "The total amount of l,000 dollars shall be paid. Stop now"
+    assert image22.compare_words(original, modified, ocr=True) == []
+
+
+def test_compare_words_keeps_confusable_edits_without_ocr():
+    assert image22.normalize_ocr_token("Total:", ocr=False) == "total:"
+    assert [c["Change"] for c in image22.compare_words("pay 5 days", "pay S days")] == ["replace"]
+    assert [c["Change"] for c in image22.compare_words("Clause 10", "Clause lO")] == ["replace"]
+    assert image22.compare_words("Clause\n10 applies", "CLAUSE 10   applies") == []
+
+
+def test_compare_words_large_repetitive_chunk():
+    rng = random.Random(0)
+    words = [f"w{rng.randrange(300)}" for _ in range(20000)]
+    edited = ["EDIT" if i % 20 == 0 else word for i, word in enumerate(words)]
+    changes = image22.compare_words(" ".join(words), " ".join(edited))
+    assert sum(c["Modified"].split().count("EDIT") for c in changes) == 1000
+    assert all(len(c["Original"].split()) <= 2 and len(c["Modified"].split()) <= 2 for c in changes)
+
+
+def test_compare_words_reports_spans():
+    original = "Payment by the Buyer on Monday to the Seller"
+    modified = "Payment by the Buyer to the Seller in full"
+    assert image22.compare_words(original, modified) == [
+        {"Change": "delete", "Original": "on Monday", "Modified": "",
+         "Original Span": (21, 30), "Modified Span": (21, 21)},
+        {"Change": "insert", "Original": "", "Modified": "in full",
+         "Original Span": (44, 44), "Modified Span": (35, 42)},
+    ]
+
+
+def test_compare_words_empty_input():
+    assert image22.compare_words("", "") == []
+    assert image22.compare_words("", "new text") == [
+        {"Change": "insert", "Original": "", "Modified": "new text",
+         "Original Span": (0, 0), "Modified Span": (0, 8)},
+    ]
+    assert image22.compare_words("old", "") == [
+        {"Change": "delete", "Original": "old", "Modified": "",
+         "Original Span": (0, 3), "Modified Span": (0, 0)},
+    ]